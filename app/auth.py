@@ -1,6 +1,8 @@
-from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
 from typing import Optional
 
+from cachetools import TTLCache
 from fastapi import Depends, Header, HTTPException, status
 
 from app.schemas import UserResponse
@@ -10,40 +12,79 @@ import secrets
 
 
 TOKEN_TTL_HOURS = 48
+TOKEN_TTL_SECONDS = TOKEN_TTL_HOURS * 3600
+# Жёсткий потолок таблицы токенов: память auth-подсистемы ограничена
+# независимо от темпа логинов. При переполнении TTLCache вытесняет самые
+# старые по вставке записи — для токенов с фиксированным сроком жизни это
+# эквивалент LRU без продления жизни на каждом обращении.
+MAX_TOKENS = 100_000
+TOKEN_SWEEP_INTERVAL_SECONDS = 60
 
 
-_tokens: dict[str, dict] = {}
+# token -> user_id; TTLCache сам проверяет срок на доступе и ограничивает
+# размер таблицы при вставке.
+_tokens: TTLCache = TTLCache(maxsize=MAX_TOKENS, ttl=TOKEN_TTL_SECONDS)
+
+# Кэш токен -> UserResponse: короткий TTL ограничивает устаревание данных
+# после обновления/удаления пользователя. Ключ — blake2b-дайджест, чтобы
+# не хранить сырые токены.
+USER_CACHE_TTL_SECONDS = 30
+
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def _cache_key(token: str) -> str:
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+async def periodic_token_sweep() -> None:
+    """Фоновая задача: периодически выметать просроченные токены."""
+    while True:
+        await asyncio.sleep(TOKEN_SWEEP_INTERVAL_SECONDS)
+        _tokens.expire()
 
 
 def create_token(user_id) -> str:
     """Создать токен для пользователя с заданным сроком."""
     token = secrets.token_urlsafe(32)
-    _tokens[token] = {
-        "user_id": user_id,
-        "expires_at": datetime.now(timezone.utc)
-        + timedelta(hours=TOKEN_TTL_HOURS),
-    }
+    _tokens[token] = user_id
     return token
 
 
-def _get_user_by_token(token: str) -> Optional[UserResponse]:
-    data = _tokens.get(token)
-    if data is None:
+def _resolve(token: str) -> Optional[UserResponse]:
+    """Разрешить токен в пользователя, минуя кэш."""
+    user_id = _tokens.get(token)
+    if user_id is None:
         return None
-    if data["expires_at"] < datetime.now(timezone.utc):
-        del _tokens[token]
-        return None
-    return users_storage.get_by_id(data["user_id"])
+    return users_storage.get_by_id(user_id)
 
 
-def get_optional_current_user(
+def _get_user_by_token(token: str) -> Optional[UserResponse]:
+    # Мемоизация через _user_cache: в отличие от functools.lru_cache,
+    # TTLCache не удерживает записи просроченных токенов дольше своего TTL.
+    key = _cache_key(token)
+    user = _user_cache.get(key)
+    if user is None:
+        user = _resolve(token)
+        if user is not None:
+            _user_cache[key] = user
+    return user
+
+
+async def get_optional_current_user(
     authorization: str | None = Header(default=None),
 ) -> Optional[UserResponse]:
     """Получить текущего пользователя, если токен передан и валиден."""
     if authorization is None:
         return None
-    scheme, _, token = authorization.partition(" ")
-    if scheme.lower() != "bearer" or not token:
+    # Прямая проверка префикса вместо partition + lower: без временных строк.
+    if not authorization.startswith(("Bearer ", "bearer ")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный формат заголовка Authorization",
+        )
+    token = authorization[7:]
+    if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный формат заголовка Authorization",
@@ -57,7 +98,7 @@ def get_optional_current_user(
     return user
 
 
-def get_current_user(
+async def get_current_user(
     current_user: UserResponse | None = Depends(get_optional_current_user),
 ) -> UserResponse:
     """Обязательная авторизация: 401, если пользователь не найден."""
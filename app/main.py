@@ -1,11 +1,16 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from uuid import UUID
 
-from fastapi import Depends, FastAPI, HTTPException, Query, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
 
 from app.schemas import (
     AdvertisementCreate,
     AdvertisementResponse,
     AdvertisementUpdate,
+    Group,
     LoginRequest,
     TokenResponse,
     UserCreate,
@@ -14,19 +19,40 @@ from app.schemas import (
 )
 from app import auth, storage, users_storage
 
+# Батч-сериализация списков одним вызовом в pydantic-core вместо повторной
+# валидации каждой модели через response_model.
+_user_list_adapter = TypeAdapter(list[UserResponse])
+_ad_list_adapter = TypeAdapter(list[AdvertisementResponse])
+
+# Проверка пароля — CPU-работа (хэширование); небольшой отдельный пул не даёт
+# всплеску логинов блокировать event loop и остальные запросы.
+_hash_pool = ThreadPoolExecutor(max_workers=4)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Фоновая уборка просроченных токенов на время работы приложения."""
+    # Ссылку на задачу держим сами: event loop хранит только слабую.
+    sweeper = asyncio.create_task(auth.periodic_token_sweep())
+    yield
+    sweeper.cancel()
+
+
 app = FastAPI(
     title="Сервис объявлений",
     description="REST API для объявлений купли/продажи",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
 @app.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest) -> TokenResponse:
+async def login(payload: LoginRequest) -> TokenResponse:
     """Авторизация пользователя, выдача токена на 48 часов."""
-    user = users_storage.verify_password(
-        username=payload.username,
-        password=payload.password,
+    user = await asyncio.get_running_loop().run_in_executor(
+        _hash_pool,
+        users_storage.verify_password,
+        payload.username,
+        payload.password,
     )
     if user is None:
         raise HTTPException(
@@ -38,7 +64,7 @@ def login(payload: LoginRequest) -> TokenResponse:
 
 
 @app.post("/user", response_model=UserResponse)
-def create_user(user: UserCreate) -> UserResponse:
+async def create_user(user: UserCreate) -> UserResponse:
     """Создание пользователя (доступно без авторизации)."""
     try:
         return users_storage.create(user)
@@ -50,20 +76,23 @@ def create_user(user: UserCreate) -> UserResponse:
 
 
 @app.get("/user", response_model=list[UserResponse])
-def list_users(
+async def list_users(
     current_user: UserResponse = Depends(auth.get_current_user),
-) -> list[UserResponse]:
+) -> Response:
     """Получить список всех пользователей (только admin)."""
-    if current_user.group != "admin":
+    if current_user.group != Group.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Недостаточно прав",
         )
-    return users_storage.list_users()
+    return Response(
+        content=_user_list_adapter.dump_json(users_storage.list_users()),
+        media_type="application/json",
+    )
 
 
 @app.get("/user/{user_id}", response_model=UserResponse)
-def get_user(user_id: UUID) -> UserResponse:
+async def get_user(user_id: UUID) -> UserResponse:
     """Получить пользователя по id (для всех)."""
     user = users_storage.get_by_id(user_id)
     if user is None:
@@ -72,13 +101,13 @@ def get_user(user_id: UUID) -> UserResponse:
 
 
 @app.patch("/user/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
     user_id: UUID,
     data: UserUpdate,
     current_user: UserResponse = Depends(auth.get_current_user),
 ) -> UserResponse:
     """Обновление данных пользователя."""
-    if current_user.group != "admin" and current_user.id != user_id:
+    if current_user.group != Group.ADMIN and current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Недостаточно прав для обновления пользователя",
@@ -96,12 +125,12 @@ def update_user(
 
 
 @app.delete("/user/{user_id}", status_code=204)
-def delete_user(
+async def delete_user(
     user_id: UUID,
     current_user: UserResponse = Depends(auth.get_current_user),
 ) -> None:
     """Удаление пользователя."""
-    if current_user.group != "admin" and current_user.id != user_id:
+    if current_user.group != Group.ADMIN and current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Недостаточно прав для удаления пользователя",
@@ -111,17 +140,13 @@ def delete_user(
 
 
 @app.post("/advertisement", response_model=AdvertisementResponse)
-def create_advertisement(
+async def create_advertisement(
     ad: AdvertisementCreate,
     current_user: UserResponse = Depends(auth.get_current_user),
 ) -> AdvertisementResponse:
     """Создание объявления (только авторизованные пользователи)."""
-    ad_with_author = AdvertisementCreate(
-        title=ad.title,
-        description=ad.description,
-        price=ad.price,
-        author=current_user.username,
-    )
+    # model_copy не запускает валидацию повторно, в отличие от конструктора.
+    ad_with_author = ad.model_copy(update={"author": current_user.username})
     return storage.create(ad_with_author)
 
 
@@ -129,7 +154,7 @@ def create_advertisement(
     "/advertisement/{advertisement_id}",
     response_model=AdvertisementResponse,
 )
-def get_advertisement(advertisement_id: UUID) -> AdvertisementResponse:
+async def get_advertisement(advertisement_id: UUID) -> AdvertisementResponse:
     """Получение объявления по id."""
     ad = storage.get_by_id(advertisement_id)
     if ad is None:
@@ -141,7 +166,7 @@ def get_advertisement(advertisement_id: UUID) -> AdvertisementResponse:
     "/advertisement/{advertisement_id}",
     response_model=AdvertisementResponse,
 )
-def update_advertisement(
+async def update_advertisement(
     advertisement_id: UUID,
     data: AdvertisementUpdate,
     current_user: UserResponse = Depends(auth.get_current_user),
@@ -150,7 +175,10 @@ def update_advertisement(
     ad = storage.get_by_id(advertisement_id)
     if ad is None:
         raise HTTPException(status_code=404, detail="Объявление не найдено")
-    if current_user.group != "admin" and current_user.username != ad.author:
+    if (
+        current_user.group != Group.ADMIN
+        and current_user.username != ad.author
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Недостаточно прав для обновления объявления",
@@ -160,7 +188,7 @@ def update_advertisement(
 
 
 @app.delete("/advertisement/{advertisement_id}", status_code=204)
-def delete_advertisement(
+async def delete_advertisement(
     advertisement_id: UUID,
     current_user: UserResponse = Depends(auth.get_current_user),
 ) -> None:
@@ -168,7 +196,10 @@ def delete_advertisement(
     ad = storage.get_by_id(advertisement_id)
     if ad is None:
         raise HTTPException(status_code=404, detail="Объявление не найдено")
-    if current_user.group != "admin" and current_user.username != ad.author:
+    if (
+        current_user.group != Group.ADMIN
+        and current_user.username != ad.author
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Недостаточно прав для удаления объявления",
@@ -177,18 +208,22 @@ def delete_advertisement(
 
 
 @app.get("/advertisement", response_model=list[AdvertisementResponse])
-def search_advertisements(
+async def search_advertisements(
     title: str | None = Query(None, description="Поиск по заголовку"),
     description: str | None = Query(None, description="Поиск по описанию"),
     price_min: float | None = Query(None, ge=0, description="Мин. цена"),
     price_max: float | None = Query(None, ge=0, description="Макс. цена"),
     author: str | None = Query(None, description="Поиск по автору"),
-) -> list[AdvertisementResponse]:
+) -> Response:
     """Поиск объявлений по полям. Все параметры опциональны (query string)."""
-    return storage.search(
+    result = storage.search(
         title=title,
         description=description,
         price_min=price_min,
         price_max=price_max,
         author=author,
     )
+    return Response(
+        content=_ad_list_adapter.dump_json(result),
+        media_type="application/json",
+    )
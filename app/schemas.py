@@ -1,8 +1,16 @@
 from datetime import datetime
+from enum import IntEnum
 from typing import Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer
+
+
+class Group(IntEnum):
+    """Группа пользователя: внутри сравнивается как int, наружу — строка."""
+
+    USER = 0
+    ADMIN = 1
 
 
 class AdvertisementBase(BaseModel):
@@ -65,9 +73,17 @@ class UserUpdate(BaseModel):
 class UserResponse(UserBase):
     """Схема ответа с пользователем (без пароля)."""
 
+    group: Group = Field(
+        Group.USER,
+        description="Группа пользователя: user или admin",
+    )
     id: UUID
     created_at: datetime
 
+    @field_serializer("group")
+    def _serialize_group(self, group: Group) -> str:
+        return group.name.lower()
+
 
 class LoginRequest(BaseModel):
     """Данные для логина."""
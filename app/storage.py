@@ -1,8 +1,17 @@
-"""Хранилище объявлений в памяти (без БД)."""
+"""Хранилище объявлений в памяти (без БД).
+
+Данные лежат колонками (SoA): цены — в numpy-массиве, чтобы числовые
+фильтры считались C-циклом по маске, строковые поля поиска и кэшированные
+ответы — в параллельных списках. Слот назначается при создании и не
+переиспользуется, поэтому возрастающий номер слота совпадает с порядком
+создания; удаление лишь помечает слот, уплотнение происходит по порогу.
+"""
 from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID, uuid4
 
+import numpy as np
+
 from app.schemas import (
     AdvertisementCreate,
     AdvertisementUpdate,
@@ -10,51 +19,113 @@ from app.schemas import (
 )
 
 
-_advertisements: dict[UUID, dict] = {}
+_INITIAL_CAPACITY = 1024
+
+# Ключ — uuid.int: хэш и сравнение int заметно дешевле, чем у UUID.
+# Значение — номер слота в колонках ниже.
+_advertisements: dict[int, int] = {}
+
+_price_col = np.empty(_INITIAL_CAPACITY, dtype=np.float64)
+_valid = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+_title_lc_col: list[str] = []
+_description_lc_col: list[str] = []
+_author_lc_col: list[str] = []
+_response_col: list[Optional[AdvertisementResponse]] = []
+_size = 0
+_tombstones = 0
+
+
+def _ensure_capacity() -> None:
+    global _price_col, _valid
+    if _size < len(_price_col):
+        return
+    capacity = len(_price_col) * 2
+    _price_col = np.resize(_price_col, capacity)
+    new_valid = np.zeros(capacity, dtype=bool)
+    new_valid[:_size] = _valid[:_size]
+    _valid = new_valid
+
+
+def _compact() -> None:
+    """Уплотнить колонки, выбросив помеченные слоты (порядок сохраняется)."""
+    global _size, _tombstones
+    keep = np.flatnonzero(_valid[:_size])
+    _price_col[: len(keep)] = _price_col[keep]
+    _valid[:_size] = False
+    _valid[: len(keep)] = True
+    for col in (_title_lc_col, _description_lc_col, _author_lc_col,
+                _response_col):
+        col[:] = [col[i] for i in keep]
+    _size = len(keep)
+    _tombstones = 0
+    # _advertisements идёт в порядке создания, как и выжившие слоты.
+    for new_slot, key in enumerate(_advertisements):
+        _advertisements[key] = new_slot
+
+
+def _set_slot(slot: int, response: AdvertisementResponse) -> None:
+    _price_col[slot] = response.price
+    _title_lc_col[slot] = response.title.lower()
+    _description_lc_col[slot] = response.description.lower()
+    _author_lc_col[slot] = response.author.lower()
+    _response_col[slot] = response
 
 
 def create(ad: AdvertisementCreate) -> AdvertisementResponse:
     """Создать объявление."""
+    global _size
     ad_id = uuid4()
-    now = datetime.now(timezone.utc)
-    record = {
-        "id": ad_id,
-        "title": ad.title,
-        "description": ad.description,
-        "price": ad.price,
-        "author": ad.author,
-        "created_at": now,
-    }
-    _advertisements[ad_id] = record
-    return AdvertisementResponse(**record)
+    response = AdvertisementResponse(
+        id=ad_id,
+        title=ad.title,
+        description=ad.description,
+        price=ad.price,
+        author=ad.author,
+        created_at=datetime.now(timezone.utc),
+    )
+    _ensure_capacity()
+    slot = _size
+    _size += 1
+    for col in (_title_lc_col, _description_lc_col, _author_lc_col,
+                _response_col):
+        col.append(None)
+    _valid[slot] = True
+    _set_slot(slot, response)
+    _advertisements[ad_id.int] = slot
+    return response
 
 
 def get_by_id(ad_id: UUID) -> Optional[AdvertisementResponse]:
     """Получить объявление по id."""
-    record = _advertisements.get(ad_id)
-    if record is None:
-        return None
-    return AdvertisementResponse(**record)
+    slot = _advertisements.get(ad_id.int)
+    return _response_col[slot] if slot is not None else None
 
 
 def update(
     ad_id: UUID, data: AdvertisementUpdate
 ) -> Optional[AdvertisementResponse]:
     """Частично обновить объявление (PATCH)."""
-    record = _advertisements.get(ad_id)
-    if record is None:
+    slot = _advertisements.get(ad_id.int)
+    if slot is None:
         return None
     update_dict = data.model_dump(exclude_unset=True)
-    record.update(update_dict)
-    return AdvertisementResponse(**record)
+    response = _response_col[slot].model_copy(update=update_dict)
+    _set_slot(slot, response)
+    return response
 
 
 def delete(ad_id: UUID) -> bool:
     """Удалить объявление. Возвращает True, если удалено."""
-    if ad_id in _advertisements:
-        del _advertisements[ad_id]
-        return True
-    return False
+    global _tombstones
+    slot = _advertisements.pop(ad_id.int, None)
+    if slot is None:
+        return False
+    _valid[slot] = False
+    _response_col[slot] = None
+    _tombstones += 1
+    if _tombstones > _size // 2:
+        _compact()
+    return True
 
 
 def search(
@@ -65,22 +136,35 @@ def search(
     author: Optional[str] = None,
 ) -> list[AdvertisementResponse]:
     """Поиск объявлений по полям (все параметры опциональны)."""
+    if (
+        title is None
+        and description is None
+        and price_min is None
+        and price_max is None
+        and author is None
+    ):
+        # Запрос без фильтров — самый частый; отдаём снимок без проверок.
+        # Слоты в _advertisements идут в порядке создания.
+        return [_response_col[slot] for slot in
+                reversed(_advertisements.values())]
+    mask = _valid[:_size].copy()
+    if price_min is not None:
+        mask &= _price_col[:_size] >= price_min
+    if price_max is not None:
+        mask &= _price_col[:_size] <= price_max
+    title_lc = title.lower() if title is not None else None
+    description_lc = description.lower() if description is not None else None
+    author_lc = author.lower() if author is not None else None
+    # Обратный обход выживших слотов даёт сортировку по created_at убыв.
     result = []
-    for record in _advertisements.values():
-        if title is not None and title.lower() not in record["title"].lower():
-            continue
-        if description is not None and description.lower() not in record[
-            "description"
-        ].lower():
-            continue
-        if price_min is not None and record["price"] < price_min:
+    for slot in np.flatnonzero(mask)[::-1]:
+        if title_lc is not None and title_lc not in _title_lc_col[slot]:
             continue
-        if price_max is not None and record["price"] > price_max:
+        if description_lc is not None and (
+            description_lc not in _description_lc_col[slot]
+        ):
             continue
-        if author is not None and author.lower() not in record[
-            "author"
-        ].lower():
+        if author_lc is not None and author_lc not in _author_lc_col[slot]:
             continue
-        result.append(AdvertisementResponse(**record))
-    result.sort(key=lambda x: x.created_at, reverse=True)
+        result.append(_response_col[slot])
     return result
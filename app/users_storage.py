@@ -1,83 +1,106 @@
 """Хранилище пользователей в памяти (без БД)."""
+import hashlib
+import hmac
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID, uuid4
 
-from app.schemas import UserCreate, UserUpdate, UserResponse
+from app.schemas import Group, UserCreate, UserUpdate, UserResponse
 
 
-_users: dict[UUID, dict] = {}
+@dataclass(slots=True)
+class UserRecord:
+    """Запись пользователя: кэш ответа + sha256-дайджест пароля."""
 
+    response: UserResponse
+    password_sha: bytes
 
-def _to_response(record: dict) -> UserResponse:
-    return UserResponse(
-        id=record["id"],
-        username=record["username"],
-        group=record["group"],
-        created_at=record["created_at"],
-    )
+
+# Ключ — uuid.int: хэш и сравнение int заметно дешевле, чем у UUID.
+_users: dict[int, UserRecord] = {}
+_username_index: dict[str, int] = {}
+
+
+def _password_digest(password: str) -> bytes:
+    return hashlib.sha256(password.encode()).digest()
 
 
 def create(user: UserCreate) -> UserResponse:
     """Создать пользователя. username должен быть уникальным."""
-    if any(rec["username"] == user.username for rec in _users.values()):
+    if user.username in _username_index:
         raise ValueError("Пользователь с таким именем уже существует")
     user_id = uuid4()
-    now = datetime.now(timezone.utc)
-    record = {
-        "id": user_id,
-        "username": user.username,
-        "password": user.password,
-        "group": user.group,
-        "created_at": now,
-    }
-    _users[user_id] = record
-    return _to_response(record)
+    response = UserResponse(
+        id=user_id,
+        username=user.username,
+        group=Group[user.group.upper()],
+        created_at=datetime.now(timezone.utc),
+    )
+    _users[user_id.int] = UserRecord(
+        response=response,
+        password_sha=_password_digest(user.password),
+    )
+    _username_index[user.username] = user_id.int
+    return response
 
 
 def get_by_id(user_id: UUID) -> Optional[UserResponse]:
     """Получить пользователя по id."""
-    record = _users.get(user_id)
-    if record is None:
-        return None
-    return _to_response(record)
+    record = _users.get(user_id.int)
+    return record.response if record is not None else None
 
 
 def list_users() -> list[UserResponse]:
     """Получить список всех пользователей."""
-    responses = [_to_response(record) for record in _users.values()]
-    responses.sort(key=lambda user: user.created_at)
-    return responses
+    # Порядок вставки в dict совпадает с порядком создания (created_at).
+    return [record.response for record in _users.values()]
 
 
 def update(user_id: UUID, data: UserUpdate) -> Optional[UserResponse]:
     """Частично обновить пользователя."""
-    record = _users.get(user_id)
+    record = _users.get(user_id.int)
     if record is None:
         return None
-    update_data = data.model_dump(exclude_unset=True)
+    # Явный null в PATCH трактуем как неустановленное поле: все поля
+    # схемы обязательные, обнулять их нельзя.
+    update_data = {
+        key: value
+        for key, value in data.model_dump(exclude_unset=True).items()
+        if value is not None
+    }
     new_username = update_data.get("username")
-    if new_username and new_username != record["username"]:
-        if any(
-            rec["username"] == new_username and rec["id"] != user_id
-            for rec in _users.values()
-        ):
+    if new_username and new_username != record.response.username:
+        if _username_index.get(new_username) not in (None, user_id.int):
             raise ValueError("Пользователь с таким именем уже существует")
-    record.update(update_data)
-    return _to_response(record)
+        _username_index.pop(record.response.username, None)
+        _username_index[new_username] = user_id.int
+    password = update_data.pop("password", None)
+    if password is not None:
+        record.password_sha = _password_digest(password)
+    if "group" in update_data:
+        update_data["group"] = Group[update_data["group"].upper()]
+    record.response = record.response.model_copy(update=update_data)
+    return record.response
 
 
 def delete(user_id: UUID) -> bool:
     """Удалить пользователя."""
-    if user_id in _users:
-        del _users[user_id]
-        return True
-    return False
+    record = _users.pop(user_id.int, None)
+    if record is None:
+        return False
+    _username_index.pop(record.response.username, None)
+    return True
 
 
 def verify_password(username: str, password: str) -> Optional[UserResponse]:
     """Проверить логин и пароль, вернуть пользователя при успехе."""
-    for record in _users.values():
-        if record["username"] == username and record["password"] == password:
-            return _to_response(record)
-    return None
+    user_key = _username_index.get(username)
+    if user_key is None:
+        return None
+    record = _users.get(user_key)
+    if record is None or not hmac.compare_digest(
+        record.password_sha, _password_digest(password)
+    ):
+        return None
+    return record.response